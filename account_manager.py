@@ -3,25 +3,103 @@
 Account Manager - Database management for accounts
 """
 
+import atexit
 import sqlite3
 import json
 import csv
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 import logging
+from contextlib import contextmanager
+
+from utils import json_dumps
 
 logger = logging.getLogger(__name__)
 
+# Column order of the accounts table
+ACCOUNT_COLUMNS = (
+    "id", "email", "password", "referral_code", "created_at", "verified",
+    "verification_code", "points", "last_task_run", "status", "cookies", "notes"
+)
+
+# Lightweight row type for hot read paths (cheaper than dict(sqlite3.Row))
+Account = namedtuple("Account", ACCOUNT_COLUMNS)
+_ACCOUNT_SELECT = ", ".join(ACCOUNT_COLUMNS)
+
+# Export directories already created in this process
+_created_dirs = set()
+
+def _ensure_parent_dir(filename: str):
+    """Create the directory for filename once per process"""
+    dirpath = os.path.dirname(filename) or "."
+    if dirpath not in _created_dirs:
+        os.makedirs(dirpath, exist_ok=True)
+        _created_dirs.add(dirpath)
+
 class AccountManager:
     """Manages accounts in SQLite database"""
     
+    _instance = None
+    
+    # Statements on the daily-task hot path, kept identical so the
+    # connection's statement cache always hits
+    _UPDATE_POINTS_SQL = '''
+        UPDATE accounts 
+        SET points = points + ?, last_task_run = CURRENT_TIMESTAMP
+        WHERE email = ?
+    '''
+    _UPDATE_POINTS_RETURNING_SQL = _UPDATE_POINTS_SQL + "RETURNING points"
+    _INSERT_HISTORY_SQL = '''
+        INSERT INTO task_history (email, task_type, xp_earned, details)
+        VALUES (?, ?, ?, ?)
+    '''
+    
+    @classmethod
+    def instance(cls, db_path: str = "accounts.db") -> "AccountManager":
+        """Get the shared process-wide manager (closed at exit)"""
+        if cls._instance is None:
+            cls._instance = cls(db_path)
+            atexit.register(cls._instance.close)
+        return cls._instance
+    
     def __init__(self, db_path: str = "accounts.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        # Autocommit mode: no implicit BEGIN before every DML statement,
+        # multi-statement writes use _transaction() explicitly
+        self.conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
+        self._cursor = self.conn.cursor()
+        # Plain-tuple cursor for queries that build Account rows
+        self._tuple_cursor = self.conn.cursor()
+        self._tuple_cursor.row_factory = None
+        self.configure_connection()
         self.init_database()
     
+    def configure_connection(self):
+        """Tune SQLite for a write-heavy single-process workload"""
+        cursor = self.conn.cursor()
+        
+        # WAL turns each commit into one append instead of two fsyncs
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA cache_size=-20000')
+        cursor.execute('PRAGMA mmap_size=268435456')
+    
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one explicit transaction"""
+        self._cursor.execute("BEGIN")
+        try:
+            yield self._cursor
+        except Exception:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+    
     def init_database(self):
         """Initialize database tables"""
         cursor = self.conn.cursor()
@@ -56,33 +134,77 @@ class AccountManager:
             )
         ''')
         
-        self.conn.commit()
+        # Indexes for the hot filters (email already has its UNIQUE index)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_accounts_verified_status
+            ON accounts (verified, status, last_task_run)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_task_history_email
+            ON task_history (email, completed_at)
+        ''')
+        
         logger.info("Database initialized")
     
     def add_account(self, email: str, password: str, referral_code: str, 
                    verified: bool = False, verification_code: str = None, 
                    cookies: str = None):
-        """Add new account to database"""
+        """Add new account to database (False if the email already exists)"""
         cursor = self.conn.cursor()
         
         try:
             cursor.execute('''
-                INSERT OR REPLACE INTO accounts 
+                INSERT INTO accounts 
                 (email, password, referral_code, verified, verification_code, cookies)
                 VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(email) DO NOTHING
+                RETURNING id
             ''', (email, password, referral_code, verified, verification_code, cookies))
             
-            self.conn.commit()
+            if cursor.fetchone() is None:
+                logger.warning(f"Account already exists: {email}")
+                return False
+            
             logger.info(f"Account added: {email}")
             return True
             
-        except sqlite3.IntegrityError:
-            logger.warning(f"Account already exists: {email}")
-            return False
         except Exception as e:
             logger.error(f"Error adding account: {e}")
             return False
     
+    def add_accounts_bulk(self, rows: List[Tuple]) -> int:
+        """
+        Add many accounts in a single transaction
+        
+        Args:
+            rows: (email, password, referral_code, verified, verification_code, cookies) tuples
+        
+        Returns:
+            Number of new accounts (existing emails are skipped)
+        """
+        if not rows:
+            return 0
+        
+        try:
+            changes_before = self.conn.total_changes
+            with self._transaction() as cursor:
+                cursor.executemany('''
+                    INSERT INTO accounts 
+                    (email, password, referral_code, verified, verification_code, cookies)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(email) DO NOTHING
+                ''', rows)
+            
+            added = self.conn.total_changes - changes_before
+            if added < len(rows):
+                logger.warning(f"Skipped {len(rows) - added} existing accounts")
+            logger.info(f"Accounts added: {added}")
+            return added
+            
+        except Exception as e:
+            logger.error(f"Error adding accounts: {e}")
+            return 0
+    
     def get_account_by_email(self, email: str) -> Optional[Dict]:
         """Get account by email"""
         cursor = self.conn.cursor()
@@ -93,16 +215,47 @@ class AccountManager:
             return dict(row)
         return None
     
+    def get_passwords(self, emails: List[str]) -> Dict[str, str]:
+        """
+        Look up passwords for many accounts at once
+        
+        Returns:
+            email -> password for the emails that exist
+        """
+        cursor = self._tuple_cursor
+        passwords = {}
+        
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(emails), 500):
+            chunk = emails[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f'SELECT email, password FROM accounts WHERE email IN ({placeholders})',
+                chunk
+            )
+            passwords.update(cursor.fetchall())
+        
+        return passwords
+    
     def get_all_accounts(self) -> List[Dict]:
         """Get all accounts"""
         cursor = self.conn.cursor()
         cursor.execute('SELECT * FROM accounts ORDER BY created_at DESC')
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_recent_accounts(self, limit: int = 5) -> List[Dict]:
+        """Get newest accounts with only the columns shown in listings"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT email, verified, points FROM accounts ORDER BY created_at DESC LIMIT ?',
+            (limit,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    
     def get_verified_accounts(self) -> List[Dict]:
         """Get verified accounts"""
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM accounts WHERE verified = 1 AND status = "active"')
+        cursor.execute("SELECT * FROM accounts WHERE verified = 1 AND status = 'active'")
         return [dict(row) for row in cursor.fetchall()]
     
     def get_pending_accounts(self) -> List[Dict]:
@@ -111,61 +264,112 @@ class AccountManager:
         cursor.execute('SELECT * FROM accounts WHERE verified = 0')
         return [dict(row) for row in cursor.fetchall()]
     
-    def update_account_points(self, email: str, points_earned: int):
-        """Update account points"""
-        cursor = self.conn.cursor()
+    def update_account_points(self, email: str, points_earned: int) -> Optional[int]:
+        """Update account points, returning the new total (None if not found)"""
+        # fetchall() runs the statement to completion so the write commits now
+        rows = self._cursor.execute(self._UPDATE_POINTS_RETURNING_SQL, (points_earned, email)).fetchall()
         
-        cursor.execute('''
-            UPDATE accounts 
-            SET points = points + ?, last_task_run = CURRENT_TIMESTAMP
-            WHERE email = ?
-        ''', (points_earned, email))
+        if not rows:
+            logger.warning(f"Cannot update points, account not found: {email}")
+            return None
         
-        self.conn.commit()
-        logger.info(f"Updated points for {email}: +{points_earned}")
+        total = rows[0][0]
+        logger.info(f"Updated points for {email}: +{points_earned} (total {total})")
+        return total
+    
+    def update_account_points_many(self, rows: List[Tuple]):
+        """
+        Update points for many accounts in a single transaction
+        
+        Args:
+            rows: (points_earned, email) tuples
+        """
+        if not rows:
+            return
+        
+        try:
+            with self._transaction() as cursor:
+                cursor.executemany(self._UPDATE_POINTS_SQL, rows)
+            
+            logger.info(f"Updated points for {len(rows)} accounts")
+            
+        except Exception as e:
+            logger.error(f"Error updating points: {e}")
     
     def record_task_completion(self, email: str, task_type: str, xp_earned: int, details: Dict = None):
         """Record task completion in history"""
-        cursor = self.conn.cursor()
+        self._cursor.execute(
+            self._INSERT_HISTORY_SQL,
+            (email, task_type, xp_earned, json_dumps(details) if details else None)
+        )
+    
+    def record_task_completions_many(self, rows: List[Tuple]):
+        """
+        Record many task completions in a single transaction
         
-        cursor.execute('''
-            INSERT INTO task_history (email, task_type, xp_earned, details)
-            VALUES (?, ?, ?, ?)
-        ''', (email, task_type, xp_earned, json.dumps(details) if details else None))
+        Args:
+            rows: (email, task_type, xp_earned, details_json) tuples, with
+                details already serialized so encoding stays outside the
+                transaction
+        """
+        if not rows:
+            return
         
-        self.conn.commit()
+        try:
+            with self._transaction() as cursor:
+                cursor.executemany(self._INSERT_HISTORY_SQL, rows)
+            
+        except Exception as e:
+            logger.error(f"Error recording task history: {e}")
     
-    def get_accounts_needing_tasks(self, hours_since: int = 20) -> List[Dict]:
-        """Get accounts that haven't run tasks in specified hours"""
-        cursor = self.conn.cursor()
+    def get_accounts_needing_tasks(self, hours_since: int = 20,
+                                   limit: Optional[int] = None) -> List[Account]:
+        """
+        Get accounts that haven't run tasks in specified hours
         
-        cursor.execute('''
-            SELECT * FROM accounts 
+        Args:
+            hours_since: Minimum hours since the last task run
+            limit: Return at most this many accounts (None for all)
+        
+        Returns:
+            Account namedtuples (use ._asdict() where a dict is needed)
+        """
+        # Same format as CURRENT_TIMESTAMP (UTC), so the raw column compares
+        # correctly as a string and the index on last_task_run stays usable
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours_since)).strftime('%Y-%m-%d %H:%M:%S')
+        
+        columns = _ACCOUNT_SELECT
+        cursor = self._tuple_cursor
+        
+        # UNION ALL instead of OR so each branch is its own index seek
+        cursor.execute(f'''
+            SELECT {columns} FROM accounts 
             WHERE verified = 1 
             AND status = 'active'
-            AND (
-                last_task_run IS NULL 
-                OR datetime(last_task_run) < datetime('now', ?)
-            )
-        ''', (f'-{hours_since} hours',))
+            AND last_task_run IS NULL
+            UNION ALL
+            SELECT {columns} FROM accounts 
+            WHERE verified = 1 
+            AND status = 'active'
+            AND last_task_run < ?
+            LIMIT ?
+        ''', (cutoff, -1 if limit is None else limit))
         
-        return [dict(row) for row in cursor.fetchall()]
+        return list(map(Account._make, cursor.fetchall()))
     
     def get_stats(self) -> Dict:
         """Get bot statistics"""
         cursor = self.conn.cursor()
         
-        cursor.execute('SELECT COUNT(*) FROM accounts')
-        total_accounts = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM accounts WHERE verified = 1')
-        verified_accounts = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM accounts WHERE verified = 0')
-        pending_accounts = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT SUM(points) FROM accounts')
-        total_points = cursor.fetchone()[0] or 0
+        # One pass over the table for all totals
+        cursor.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(CASE WHEN verified = 1 THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN verified = 0 THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(points), 0)
+            FROM accounts
+        ''')
+        total_accounts, verified_accounts, pending_accounts, total_points = cursor.fetchone()
         
         cursor.execute('''
             SELECT referral_code, COUNT(*) as count 
@@ -194,51 +398,62 @@ class AccountManager:
         }
     
     def export_to_csv(self, filename: str):
-        """Export accounts to CSV"""
-        accounts = self.get_all_accounts()
+        """Export accounts to CSV (streamed from the cursor)"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM accounts ORDER BY created_at DESC')
         
-        os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else ".", exist_ok=True)
+        _ensure_parent_dir(filename)
         
+        count = 0
         with open(filename, 'w', newline='', encoding='utf-8') as f:
-            if accounts:
-                fieldnames = accounts[0].keys()
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(accounts)
+            first = cursor.fetchone()
+            if first is not None:
+                writer = csv.writer(f)
+                writer.writerow([column[0] for column in cursor.description])
+                writer.writerow(first)
+                count = 1
+                for row in cursor:
+                    writer.writerow(row)
+                    count += 1
         
-        logger.info(f"Exported {len(accounts)} accounts to {filename}")
+        logger.info(f"Exported {count} accounts to {filename}")
     
     def export_to_json(self, filename: str):
-        """Export accounts to JSON"""
-        accounts = self.get_all_accounts()
+        """Export accounts to JSON (streamed from the cursor)"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM accounts ORDER BY created_at DESC')
         
-        os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else ".", exist_ok=True)
+        _ensure_parent_dir(filename)
         
+        count = 0
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                "exported_at": datetime.now().isoformat(),
-                "total_accounts": len(accounts),
-                "accounts": accounts
-            }, f, indent=2)
+            f.write('{\n  "exported_at": %s,\n  "accounts": [' % json.dumps(datetime.now().isoformat()))
+            for row in cursor:
+                f.write(',\n    ' if count else '\n    ')
+                f.write(json.dumps(dict(row)))
+                count += 1
+            # Total goes last so it can be counted while streaming
+            f.write('%s],\n  "total_accounts": %d\n}' % ('\n  ' if count else '', count))
         
-        logger.info(f"Exported {len(accounts)} accounts to {filename}")
+        logger.info(f"Exported {count} accounts to {filename}")
     
     def delete_account(self, email: str):
         """Delete account from database"""
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM accounts WHERE email = ?', (email,))
-        cursor.execute('DELETE FROM task_history WHERE email = ?', (email,))
-        self.conn.commit()
+        with self._transaction() as cursor:
+            cursor.execute('DELETE FROM accounts WHERE email = ?', (email,))
+            cursor.execute('DELETE FROM task_history WHERE email = ?', (email,))
         logger.info(f"Deleted account: {email}")
     
     def close(self):
         """Close database connection"""
         self.conn.close()
+        if AccountManager._instance is self:
+            AccountManager._instance = None
 
 # Utility functions
 def show_dashboard():
     """Display account dashboard"""
-    manager = AccountManager()
+    manager = AccountManager.instance()
     stats = manager.get_stats()
     
     print("\n" + "="*60)
@@ -256,7 +471,7 @@ def show_dashboard():
             print(f"  {ref['code']}: {ref['count']} accounts")
     
     # Show recent accounts
-    accounts = manager.get_all_accounts()[:5]
+    accounts = manager.get_recent_accounts(5)
     if accounts:
         print(f"\n📝 Recent Accounts:")
         for acc in accounts:
@@ -264,7 +479,6 @@ def show_dashboard():
             points = acc.get("points", 0)
             print(f"  {status} {acc['email'][:25]:25} | {points:4} pts")
     
-    manager.close()
     print("="*60)
 
 if __name__ == "__main__":
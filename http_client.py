@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+HTTP Client - Shared connection-pooled async client for the bots
+"""
+
+import asyncio
+import time
+import random
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Awaitable, Dict, Optional, TypeVar
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:  # optional, HTTP/1.1 keep-alive is the fallback
+    HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Every rate-limit wait goes through this hook, so it can be swapped out
+# (e.g. for a fake clock) without touching asyncio.sleep itself
+_sleep = asyncio.sleep
+
+# Headers common to every account; per-account ones go on each request
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Content-Type": "application/json"
+}
+
+def _build_client() -> httpx.AsyncClient:
+    """Client with keep-alive pools sized for concurrent accounts"""
+    # Cookies belong to one account, so the shared client never keeps any;
+    # each bot holds its own jar and passes it per request
+    blocked_jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    
+    # Only connection failures are retried here, they are safe for POSTs
+    # (pool size and HTTP/2 are set on the transport, which owns the pool)
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        cookies=blocked_jar,
+        # Redirects are followed in send(), which carries the caller's
+        # cookies to every hop (httpx would rebuild them from this jar)
+        follow_redirects=False,
+        timeout=30,
+        transport=httpx.AsyncHTTPTransport(
+            http2=HTTP2,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    )
+
+# One client per event loop (asyncio.run makes a new loop each time):
+# reused TLS connections, and HTTP/2 streams, across bots and accounts
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_client() -> httpx.AsyncClient:
+    """Shared client for the running event loop, created on first use"""
+    global _client, _client_loop
+    
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+async def close_client():
+    """Close the shared client, if one is open on this loop"""
+    global _client, _client_loop
+    
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+def run(main: Awaitable[T]) -> T:
+    """asyncio.run, closing the shared client before the loop shuts down"""
+    async def runner() -> T:
+        try:
+            return await main
+        finally:
+            await close_client()
+    
+    return asyncio.run(runner())
+
+class _Bucket:
+    """Token bucket state for one host"""
+    __slots__ = ("rate", "tokens", "updated", "streak")
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.streak = 0
+
+class RateLimiter:
+    """
+    Token bucket per host that backs off when the server pushes back
+    
+    Each 429 halves the host's rate (down to min_rate); every recover_after
+    consecutive 2xx responses double it again, up to the configured rate.
+    Runs on the event loop: the bookkeeping never awaits, so it needs no lock.
+    """
+    
+    def __init__(self, rate: float = 10.0, min_rate: float = 0.5, recover_after: int = 10):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.recover_after = recover_after
+        self._buckets: Dict[str, _Bucket] = {}
+    
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.rate)
+        return bucket
+    
+    async def acquire(self, host: str):
+        """Take one token for host, sleeping until it is available"""
+        bucket = self._bucket(host)
+        now = time.monotonic()
+        
+        # Refill (burst of up to one second's worth), then reserve a
+        # token; a negative balance is the queue of waiting callers
+        bucket.tokens = min(bucket.rate, bucket.tokens + (now - bucket.updated) * bucket.rate) - 1
+        bucket.updated = now
+        
+        if bucket.tokens < 0:
+            await _sleep(-bucket.tokens / bucket.rate)
+    
+    def record(self, host: str, status_code: int):
+        """Adjust host's rate from a response status"""
+        bucket = self._bucket(host)
+        
+        if status_code == 429:
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            bucket.tokens = min(bucket.tokens, bucket.rate)
+            bucket.streak = 0
+            logger.info(f"Rate for {host} lowered to {bucket.rate:.2f} req/s")
+        elif 200 <= status_code < 300:
+            bucket.streak += 1
+            if bucket.streak >= self.recover_after and bucket.rate < self.rate:
+                bucket.rate = min(self.rate, bucket.rate * 2)
+                bucket.streak = 0
+                logger.info(f"Rate for {host} raised to {bucket.rate:.2f} req/s")
+        else:
+            # Any other status breaks the run of consecutive successes
+            bucket.streak = 0
+
+# Requests per second per host, shared by every bot in the process
+SHARED_LIMITER = RateLimiter(rate=10.0)
+
+# Retries for 429 responses, and the most time spent waiting on them
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RATE_LIMIT_WAIT = 120
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+async def _send_following(client: httpx.AsyncClient, request: httpx.Request,
+                          cookies: Optional[httpx.Cookies], stream: bool) -> httpx.Response:
+    """Send request and follow its redirects, with the caller's cookies on every hop"""
+    history = []
+    
+    while True:
+        if cookies is not None:
+            cookies.set_cookie_header(request)
+        
+        host = request.url.netloc.decode("ascii")
+        await SHARED_LIMITER.acquire(host)
+        response = await client.send(request, stream=stream, follow_redirects=False)
+        SHARED_LIMITER.record(host, response.status_code)
+        
+        if cookies is not None:
+            cookies.extract_cookies(response)
+        
+        next_request = response.next_request
+        if next_request is None:
+            response.history = history
+            return response
+        
+        await response.aclose()
+        history.append(response)
+        if len(history) > client.max_redirects:
+            raise httpx.TooManyRedirects("Exceeded maximum allowed redirects.", request=request)
+        
+        # Any Cookie header httpx put on the hop came from the client's jar;
+        # the caller's jar is the source of truth for this account
+        request = next_request
+        if cookies is not None:
+            request.headers.pop("Cookie", None)
+
+async def send(client: Optional[httpx.AsyncClient], method: str, url: str,
+               headers: Optional[Dict] = None, cookies: Optional[httpx.Cookies] = None,
+               stream: bool = False, **kwargs) -> httpx.Response:
+    """
+    Send a request, keeping cookies in the caller's own jar
+    
+    Redirects are followed here, and every hop (and every attempt) first
+    takes a token from SHARED_LIMITER for its host.
+    A 429 response is retried after the server's Retry-After delay (or an
+    exponential backoff with jitter when there is none), up to
+    MAX_RATE_LIMIT_RETRIES times and MAX_RATE_LIMIT_WAIT seconds in total.
+    The last response is returned as-is once the budget is spent.
+    
+    Args:
+        client: Client to send through (None for the shared one)
+        headers: Extra headers for this request only
+        cookies: Per-account jar, sent with the request and updated from
+            the response (including redirects)
+        stream: Leave the body unread; the caller must aclose() the response
+    """
+    client = client or get_client()
+    waited = 0.0
+    
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        request = client.build_request(method, url, headers=headers, **kwargs)
+        response = await _send_following(client, request, cookies, stream)
+        
+        if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+        
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = min(2 ** attempt, 30) + random.uniform(0, 1)
+        
+        if waited + delay > MAX_RATE_LIMIT_WAIT:
+            logger.warning(f"Rate limited by {url}, not waiting {delay:.0f}s more")
+            return response
+        
+        logger.warning(f"Rate limited by {url}, retrying in {delay:.1f}s")
+        await response.aclose()
+        await _sleep(delay)
+        waited += delay
+    
+    return response
+
+class AccountSession:
+    """
+    Request state of one account: pooled client, headers and cookie jar
+    
+    Bots set client (None: the loop's shared one), headers and cookies in
+    __init__; _send keeps every request on this account's own state.
+    """
+    client: Optional[httpx.AsyncClient]
+    headers: Dict
+    cookies: httpx.Cookies
+    
+    async def _send(self, method: str, url: str, headers: Dict = None, **kwargs) -> httpx.Response:
+        """Send with this bot's headers and cookies"""
+        return await send(
+            self.client, method, url,
+            headers={**self.headers, **(headers or {})},
+            cookies=self.cookies,
+            **kwargs
+        )
@@ -6,12 +6,57 @@ Main email generation module for SoSoValue Bot
 
 import random
 import string
-import json
+import asyncio
 import logging
-from typing import List, Optional
+import threading
+from typing import Awaitable, Callable, List, Optional
+
+from utils import load_config
 
 logger = logging.getLogger(__name__)
 
+# Async source of verification codes: takes the email, returns the code
+# or None to skip (e.g. a provider polling an IMAP inbox)
+CodeProvider = Callable[[str], Awaitable[Optional[str]]]
+
+# Only one interactive prompt may own stdin at a time (one lock per event
+# loop, asyncio.run makes a new loop each time)
+_prompt_lock: Optional[asyncio.Lock] = None
+_prompt_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_base_gmail() -> str:
+    """Get base Gmail from the cached config ("" if unavailable)"""
+    try:
+        return load_config().get("base_gmail", "")
+    except Exception:
+        return ""
+
+def _random_dot_mask(gaps: int) -> int:
+    """
+    Pick 1-3 distinct gap positions as a bitmask
+    
+    Bit i set means a dot goes between character i and i+1.
+    """
+    num_dots = random.randint(1, min(3, gaps))
+    
+    mask = 0
+    dots = 0
+    while dots < num_dots:
+        bit = 1 << random.randrange(gaps)
+        if not mask & bit:
+            mask |= bit
+            dots += 1
+    return mask
+
+def _insert_dots(local_part: str, mask: int) -> str:
+    """Insert a dot after every character whose gap bit is set in mask"""
+    out = [local_part[0]]
+    for i, c in enumerate(local_part[1:], 1):
+        if mask >> (i - 1) & 1:
+            out.append('.')
+        out.append(c)
+    return ''.join(out)
+
 def generate_gmail_variation(base_gmail: str) -> str:
     """
     Generate a Gmail dot trick variation
@@ -29,29 +74,11 @@ def generate_gmail_variation(base_gmail: str) -> str:
     # Extract local part
     local_part = base_gmail.split("@")[0]
     
-    # Decide how many dots to add (1-3)
-    num_dots = random.randint(1, min(3, len(local_part) - 1))
-    
-    # Convert to list for dot insertion
-    chars = list(local_part)
-    
-    # Get available positions (not at start or end)
-    available_positions = list(range(1, len(chars)))
-    
-    # Randomly select positions for dots
-    if num_dots > len(available_positions):
-        num_dots = len(available_positions)
-    
-    dot_positions = random.sample(available_positions, num_dots)
-    dot_positions.sort(reverse=True)  # Sort in reverse for insertion
-    
-    # Insert dots at selected positions
-    for pos in dot_positions:
-        chars.insert(pos, '.')
+    # Add 1-3 dots, never at start or end
+    mask = _random_dot_mask(len(local_part) - 1)
     
     # Create the new email
-    new_local = ''.join(chars)
-    email = f"{new_local}@gmail.com"
+    email = f"{_insert_dots(local_part, mask)}@gmail.com"
     
     logger.info(f"Generated Gmail variation: {email} -> {base_gmail}")
     return email
@@ -89,21 +116,13 @@ def getmails(count: int = 1):
     Returns:
         Single email if count=1, list otherwise
     """
-    # Try to load config to get base Gmail
-    try:
-        with open("config.json", "r") as f:
-            config = json.load(f)
-            base_gmail = config.get("base_gmail", "")
-    except:
-        base_gmail = ""
-    
-    emails = []
-    for _ in range(count):
-        if base_gmail:
-            email = generate_gmail_variation(base_gmail)
-        else:
-            email = generate_temp_email()
-        emails.append(email)
+    # Base Gmail from config, if configured
+    base_gmail = _get_base_gmail()
+    
+    if base_gmail:
+        emails = [generate_gmail_variation(base_gmail) for _ in range(count)]
+    else:
+        emails = [generate_temp_email() for _ in range(count)]
     
     if count == 1:
         return emails[0]
@@ -127,16 +146,11 @@ def get_verification_code(email: str = None) -> Optional[str]:
         if email:
             if "@gmail.com" in email:
                 # Try to show the real Gmail
-                try:
-                    with open("config.json", "r") as f:
-                        config = json.load(f)
-                        base_gmail = config.get("base_gmail", "")
-                        if base_gmail:
-                            print(f"Gmail variation: {email}")
-                            print(f"Real inbox: {base_gmail}")
-                        else:
-                            print(f"Email: {email}")
-                except:
+                base_gmail = _get_base_gmail()
+                if base_gmail:
+                    print(f"Gmail variation: {email}")
+                    print(f"Real inbox: {base_gmail}")
+                else:
                     print(f"Email: {email}")
             else:
                 print(f"Email: {email}")
@@ -167,12 +181,56 @@ def get_verification_code(email: str = None) -> Optional[str]:
         logger.error(f"Error getting verification code: {e}")
         return None
 
+def _get_prompt_lock() -> asyncio.Lock:
+    """Prompt lock for the running event loop, created on first use"""
+    global _prompt_lock, _prompt_loop
+    
+    loop = asyncio.get_running_loop()
+    if _prompt_lock is None or _prompt_loop is not loop:
+        _prompt_lock = asyncio.Lock()
+        _prompt_loop = loop
+    return _prompt_lock
+
+async def prompt_code_provider(email: str) -> Optional[str]:
+    """
+    Default CodeProvider: ask on stdin without blocking the event loop
+    
+    input() runs on a daemon thread, so other accounts keep going while the
+    user types. Cancelling (Ctrl+C) returns at once; the abandoned reader
+    never holds up shutdown.
+    """
+    async with _get_prompt_lock():
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def deliver(code: Optional[str]):
+            if not future.done():
+                future.set_result(code)
+        
+        def reader():
+            code = get_verification_code(email)
+            try:
+                loop.call_soon_threadsafe(deliver, code)
+            except RuntimeError:  # loop already closed, nobody is waiting
+                pass
+        
+        threading.Thread(target=reader, name="code-prompt", daemon=True).start()
+        return await future
+
 def generate_multiple_variations(base_gmail: str, count: int) -> List[str]:
     """Generate multiple Gmail variations"""
-    variations = []
-    for i in range(count):
-        var = generate_gmail_variation(base_gmail)
-        variations.append(var)
+    if not base_gmail or "@gmail.com" not in base_gmail:
+        return [generate_temp_email() for _ in range(count)]
+    
+    # Split the address once, then only draw masks per variation
+    local_part = base_gmail.split("@")[0]
+    gaps = len(local_part) - 1
+    
+    variations = [
+        f"{_insert_dots(local_part, _random_dot_mask(gaps))}@gmail.com"
+        for _ in range(count)
+    ]
+    logger.info(f"Generated {count} Gmail variations -> {base_gmail}")
     return variations
 
 # Test function
@@ -5,12 +5,13 @@ SoSoValue Bot - Main Controller with Gmail Dot Trick
 
 import os
 import sys
-import json
-import time
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from account_manager import AccountManager
+from utils import json_dumps, json_dumps_indent, load_config, save_config
+
 # Configure logging
 os.makedirs("logs", exist_ok=True)
 logging.basicConfig(
@@ -24,11 +25,17 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class SoSoValueBot:
-    def __init__(self):
+    def __init__(self, code_provider=None):
         self.config = self.load_config()
         self.referral_code = self.config.get("referral_code", "NPH90834")
         self.base_gmail = self.config.get("base_gmail", "")
         
+        # Shared database manager, closed once at exit
+        self.manager = AccountManager.instance()
+        
+        # Where verification codes come from (None: interactive prompt)
+        self.code_provider = code_provider
+        
         logger.info(f"SoSoValue Bot initialized")
         logger.info(f"Referral Code: {self.referral_code}")
         
@@ -47,57 +54,50 @@ class SoSoValueBot:
             "daily_batch_size": 5,
             "delay_between_accounts": 10,
             "max_retries": 3,
+            "concurrency": 3,
             "termux_mode": True,
             "log_level": "INFO"
         }
         
         try:
-            with open("config.json", "r") as f:
-                user_config = json.load(f)
-                default_config.update(user_config)
-                logger.info("Loaded config.json")
+            default_config.update(load_config())
+            logger.info("Loaded config.json")
         except FileNotFoundError:
             logger.warning("config.json not found, creating with defaults")
-            with open("config.json", "w") as f:
-                json.dump(default_config, f, indent=2)
+            save_config(default_config)
         
         return default_config
     
     def create_accounts(self, count: int = 5):
         """Create new accounts"""
         try:
-            from referral_bot import ReferralBot
+            from referral_bot import AsyncReferralBot
+            from http_client import run
         except ImportError as e:
             print(f"Error: {e}")
             print("Make sure referral_bot.py exists")
             return []
         
-        logger.info(f"Creating {count} accounts...")
+        logger.info("Creating %d accounts...", count)
         
-        bot = ReferralBot(self.referral_code, self.base_gmail)
+        bot = AsyncReferralBot(self.referral_code, self.base_gmail, self.code_provider)
         results = []
+        created = []
         
-        for i in range(count):
-            try:
-                logger.info(f"Creating account {i+1}/{count}")
-                
-                # Create account
-                result = bot.create_account()
-                results.append(result)
-                
-                # Save progress
-                if result.get("success"):
-                    self.save_account(result)
-                
-                # Delay between accounts
-                if i < count - 1:
-                    delay = self.config["delay_between_accounts"]
-                    logger.info(f"Waiting {delay} seconds...")
-                    time.sleep(delay)
-                    
-            except Exception as e:
-                logger.error(f"Error creating account: {e}")
-                results.append({"error": str(e)})
+        def collect(result: Dict):
+            # Collect for a single bulk save
+            if result.get("success"):
+                created.append(result)
+        
+        try:
+            results = run(bot.create_multiple_accounts(
+                count,
+                concurrency=max(1, int(self.config.get("concurrency", 3))),
+                on_result=collect
+            ))
+        finally:
+            # Save progress (also on Ctrl+C, accounts already exist remotely)
+            self.save_accounts(created)
         
         # Generate report
         self.generate_report(results, "account_creation")
@@ -107,16 +107,16 @@ class SoSoValueBot:
         """Run daily tasks for all accounts"""
         try:
             from task_bot import TaskBot
-            from account_manager import AccountManager
+            from http_client import run
         except ImportError as e:
             print(f"Error: {e}")
-            print("Make sure task_bot.py and account_manager.py exist")
+            print("Make sure task_bot.py exists")
             return []
         
         logger.info("Running daily tasks...")
         
         # Get active accounts
-        manager = AccountManager()
+        manager = self.manager
         accounts = manager.get_all_accounts()
         
         if not accounts:
@@ -125,38 +125,30 @@ class SoSoValueBot:
         
         logger.info(f"Found {len(accounts)} accounts")
         
-        # Process accounts
-        results = []
-        task_bot = TaskBot()
+        # Process accounts concurrently
+        concurrency = max(1, int(self.config.get("concurrency", 3)))
+        credentials = {account["email"]: account["password"] for account in accounts}
+        results = run(TaskBot().complete_all_tasks_batch(credentials, concurrency=concurrency))
         
-        for i, account in enumerate(accounts):
-            try:
-                logger.info(f"Processing account {i+1}/{len(accounts)}: {account['email']}")
-                
-                # Run tasks
-                result = task_bot.complete_all_tasks(
-                    email=account["email"],
-                    password=account["password"]
-                )
-                
-                # Update account
-                if result.get("success"):
-                    manager.update_account_points(
-                        email=account["email"],
-                        points_earned=result.get("total_xp", 0)
-                    )
-                
-                results.append(result)
-                
-                # Delay between accounts
-                if i < len(accounts) - 1:
-                    time.sleep(5)
-                    
-            except Exception as e:
-                logger.error(f"Error processing {account['email']}: {e}")
-                results.append({"email": account["email"], "error": str(e)})
+        # Queue account updates for one batch write each
+        history = []
+        points = []
+        
+        for account, result in zip(accounts, results):
+            if result.get("success"):
+                points.append((result.get("total_xp", 0), account["email"]))
+            
+            for task_type, task_result in result.get("tasks", {}).items():
+                if task_result.get("success"):
+                    history.append((
+                        account["email"],
+                        task_type,
+                        task_result.get("xp", 0),
+                        json_dumps(task_result)
+                    ))
         
-        manager.close()
+        manager.update_account_points_many(points)
+        manager.record_task_completions_many(history)
         
         # Generate report
         self.generate_report(results, "daily_tasks")
@@ -165,12 +157,8 @@ class SoSoValueBot:
     def save_account(self, account_data: Dict):
         """Save account to database"""
         try:
-            from account_manager import AccountManager
-            
-            manager = AccountManager()
-            
             if account_data.get("success"):
-                manager.add_account(
+                self.manager.add_account(
                     email=account_data["email"],
                     password=account_data["password"],
                     referral_code=self.referral_code,
@@ -184,6 +172,31 @@ class SoSoValueBot:
         except Exception as e:
             logger.error(f"Error saving account: {e}")
     
+    def save_accounts(self, accounts: List[Dict]):
+        """Save several accounts to database in one transaction"""
+        if not accounts:
+            return
+        
+        try:
+            rows = [
+                (
+                    account_data["email"],
+                    account_data["password"],
+                    self.referral_code,
+                    account_data.get("verified", False),
+                    account_data.get("verification_code"),
+                    None
+                )
+                for account_data in accounts
+                if account_data.get("success")
+            ]
+            
+            saved = self.manager.add_accounts_bulk(rows)
+            logger.info(f"Accounts saved: {saved}")
+            
+        except Exception as e:
+            logger.error(f"Error saving accounts: {e}")
+    
     def generate_report(self, results: List[Dict], report_type: str):
         """Generate report file"""
         try:
@@ -200,8 +213,8 @@ class SoSoValueBot:
                 "results": results
             }
             
-            with open(report_file, "w") as f:
-                json.dump(report, f, indent=2)
+            with open(report_file, "wb") as f:
+                f.write(json_dumps_indent(report))
             
             logger.info(f"Report saved: {report_file}")
             
@@ -211,13 +224,7 @@ class SoSoValueBot:
     def show_stats(self):
         """Show bot statistics"""
         try:
-            from account_manager import AccountManager
-        except ImportError as e:
-            print(f"Error: {e}")
-            return
-        
-        try:
-            manager = AccountManager()
+            manager = self.manager
             stats = manager.get_stats()
             
             print("\n" + "="*60)
@@ -237,15 +244,13 @@ class SoSoValueBot:
             print("="*60)
             
             # Show recent accounts
-            accounts = manager.get_all_accounts()[:5]
+            accounts = manager.get_recent_accounts(5)
             if accounts:
                 print("\n📝 Recent Accounts:")
                 for acc in accounts:
                     status = "✓" if acc.get("verified") else "⏳"
                     print(f"  {status} {acc['email'][:25]:25} | {acc.get('points', 0):3} pts")
             
-            manager.close()
-            
         except Exception as e:
             logger.error(f"Error showing stats: {e}")
             print(f"Error: {e}")
@@ -261,11 +266,9 @@ class SoSoValueBot:
             print("❌ Must be a Gmail address")
             return
         
-        # Update config
+        # Update config (rewritten only if it actually changed)
         self.config["base_gmail"] = base_email
-        
-        with open("config.json", "w") as f:
-            json.dump(self.config, f, indent=2)
+        save_config(self.config)
         
         self.base_gmail = base_email
         
@@ -338,12 +341,9 @@ def main():
                 bot.setup_gmail()
                 
             elif choice == "5":
-                from account_manager import AccountManager
-                manager = AccountManager()
                 filename = f"data/accounts_{datetime.now().strftime('%Y%m%d')}.csv"
-                manager.export_to_csv(filename)
+                bot.manager.export_to_csv(filename)
                 print(f"Accounts exported to: {filename}")
-                manager.close()
                 
             elif choice == "6":
                 print("\nTo schedule daily tasks:")
@@ -3,49 +3,126 @@
 Referral Bot - Creates accounts using referral code and Gmail dot trick
 """
 
-import requests
-import time
-import random
+import httpx
+import os
+import asyncio
+import secrets
 import string
+import re
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Optional
-from urllib.parse import urljoin
+from typing import Callable, ClassVar, Dict, Optional
+
+from http_client import AccountSession, run
+from utils import json_dumps, json_loads, load_config, race_endpoints
 
 logger = logging.getLogger(__name__)
 
-class ReferralBot:
-    """Creates SoSoValue accounts using referral code"""
+# CSRF input on the signup page, matched on raw bytes and within one tag
+_CSRF_RE = re.compile(rb'name="[^"]*csrf[^"]*"[^>]*value="([^"]+)"', re.IGNORECASE)
+# Longest unfinished tag carried over between streamed chunks
+_CSRF_MAX_TAG = 4096
+
+_PASSWORD_ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+
+# Markers of a successful signup in a non-JSON body, in the usual casings
+_SUCCESS_TOKENS = (b"success", b"Success", b"SUCCESS", b"verify", b"Verify", b"VERIFY")
+
+def _has_success_token(content: bytes) -> bool:
+    """Whether a raw response body mentions success or verification"""
+    return any(token in content for token in _SUCCESS_TOKENS)
+
+def _is_success_result(result) -> bool:
+    """Whether a parsed JSON body reports a successful signup"""
+    if result.get("success") is True:
+        return True
+    
+    status = result.get("status")
+    if isinstance(status, str) and status.lower() in ("ok", "success"):
+        return True
+    
+    message = result.get("message") or result.get("msg")
+    return isinstance(message, str) and (
+        "success" in message.lower() or "verification" in message.lower()
+    )
+
+class AsyncReferralBot(AccountSession):
+    """Creates SoSoValue accounts using referral code, many at a time"""
+    
+    # Candidate endpoints, raced until one works
+    REGISTER_ENDPOINTS = (
+        "/api/auth/signup",
+        "/api/register",
+        "/api/v1/auth/register",
+        "/auth/register"
+    )
+    VERIFY_ENDPOINTS = (
+        "/api/auth/verify",
+        "/api/verify",
+        "/auth/verify"
+    )
+    
+    # One JSON line per created account, appended as results come in
+    PROGRESS_PATH = "data/account_progress.jsonl"
     
-    def __init__(self, referral_code: str = "NPH90834", base_gmail: str = None):
+    # Winning endpoint URLs by base_url, shared by all bots
+    _register_url_cache: ClassVar[Dict[str, str]] = {}
+    _verify_url_cache: ClassVar[Dict[str, str]] = {}
+    # base_urls whose signup API rejected a body without confirmPassword
+    _confirm_password_required: ClassVar[Dict[str, bool]] = {}
+    
+    def __init__(self, referral_code: str = "NPH90834", base_gmail: str = None,
+                 code_provider=None, client: httpx.AsyncClient = None):
+        from mail_generator import prompt_code_provider
+        
         self.referral_code = referral_code
         self.base_gmail = base_gmail
+        # Async CodeProvider (see mail_generator), stdin prompt by default
+        self.code_provider = code_provider or prompt_code_provider
         self.base_url = "https://www.sosovalue.com"
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Content-Type": "application/json",
+        # Full candidate URLs, built once instead of on every attempt
+        self._register_urls = [f"{self.base_url}{endpoint}" for endpoint in self.REGISTER_ENDPOINTS]
+        self._verify_urls = [f"{self.base_url}{endpoint}" for endpoint in self.VERIFY_ENDPOINTS]
+        self._signup_url = f"{self.base_url}/join/{referral_code}"
+        # Fields shared by every signup body; email/password are merged in
+        self._reg_template = {
+            "referralCode": referral_code,
+            "agreeToTerms": True,
+            "newsletter": False
+        }
+        # Pooled client shared with other bots (None: the loop's shared
+        # one); state stays on this bot
+        self.client = client
+        self.headers = {
             "Origin": self.base_url,
-            "Referer": f"{self.base_url}/join/{referral_code}"
-        })
+            "Referer": self._signup_url
+        }
+        self.cookies = httpx.Cookies()
+        # Signup page CSRF token, reused while the site keeps accepting it
+        self.csrf_token = None
         
         logger.info(f"Referral bot initialized with code: {referral_code}")
         if base_gmail:
             logger.info(f"Gmail mode active: {base_gmail}")
     
+    async def _post(self, url: str, **kwargs) -> httpx.Response:
+        """POST with this bot's headers and cookies"""
+        return await self._send("POST", url, **kwargs)
+    
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        """GET with this bot's headers and cookies"""
+        return await self._send("GET", url, **kwargs)
+    
     def generate_password(self, length: int = 12) -> str:
-        """Generate random password"""
-        chars = string.ascii_letters + string.digits + "!@#$%^&*"
-        return ''.join(random.choice(chars) for _ in range(length))
+        """Generate random password (CSPRNG, uniform over the alphabet)"""
+        return ''.join([secrets.choice(_PASSWORD_ALPHABET) for _ in range(length)])
     
-    def create_account(self) -> Dict:
+    async def create_account(self) -> Dict:
         """Create a new account with referral"""
         try:
             # Generate email
-            from mail_generator import getmails, get_verification_code
+            from mail_generator import getmails
             
             email = getmails(1)  # This uses Gmail dot trick if configured
             password = self.generate_password()
@@ -53,17 +130,17 @@ class ReferralBot:
             logger.info(f"Creating account: {email}")
             
             # Try to register
-            register_result = self._register_account(email, password)
+            register_result = await self._register_account(email, password)
             
             if not register_result.get("success"):
                 return register_result
             
             # Get verification code
-            verification_code = get_verification_code(email)
+            verification_code = await self.code_provider(email)
             
             if verification_code:
                 # Try to verify
-                verify_result = self._verify_account(email, verification_code)
+                verify_result = await self._verify_account(email, verification_code)
                 
                 return {
                     "success": True,
@@ -95,80 +172,83 @@ class ReferralBot:
                 "email": email if 'email' in locals() else "unknown"
             }
     
-    def _register_account(self, email: str, password: str) -> Dict:
+    async def _register_account(self, email: str, password: str) -> Dict:
         """Register account on SoSoValue"""
         try:
-            # Try different registration endpoints
-            endpoints = [
-                "/api/auth/signup",
-                "/api/register",
-                "/api/v1/auth/register",
-                "/auth/register"
-            ]
+            registration_data = {**self._reg_template, "email": email, "password": password}
+            if self._confirm_password_required.get(self.base_url):
+                registration_data["confirmPassword"] = password
             
-            registration_data = {
-                "email": email,
-                "password": password,
-                "confirmPassword": password,
-                "referralCode": self.referral_code,
-                "agreeToTerms": True,
-                "newsletter": False
-            }
+            _, result = await race_endpoints(
+                self._register_url_cache, self.base_url, self._register_urls,
+                lambda url: self._register_at(url, email, registration_data)
+            )
             
-            for endpoint in endpoints:
-                try:
-                    logger.info(f"Trying registration endpoint: {endpoint}")
-                    
-                    response = self.session.post(
-                        urljoin(self.base_url, endpoint),
-                        json=registration_data,
-                        timeout=30
-                    )
-                    
-                    logger.debug(f"Registration response: {response.status_code}")
-                    
-                    if response.status_code in [200, 201]:
-                        # Check response
-                        try:
-                            result = response.json()
-                            if "success" in str(result).lower() or "verification" in str(result).lower():
-                                logger.info(f"Registration successful for {email}")
-                                return {"success": True, "message": "Registration successful"}
-                        except:
-                            # If not JSON, check text
-                            if "success" in response.text.lower() or "verify" in response.text.lower():
-                                logger.info(f"Registration successful for {email}")
-                                return {"success": True, "message": "Registration successful"}
-                    
-                    # If we get here, try next endpoint
-                    
-                except Exception as e:
-                    logger.debug(f"Endpoint {endpoint} failed: {e}")
-                    continue
+            if result:
+                return result
             
             # If all endpoints failed, try direct form
-            return self._try_direct_registration(email, password)
+            return await self._try_direct_registration(email, password)
             
         except Exception as e:
             logger.error(f"Registration failed: {e}")
             return {"success": False, "error": f"Registration failed: {str(e)}"}
     
-    def _try_direct_registration(self, email: str, password: str) -> Dict:
-        """Try direct form submission as fallback"""
+    async def _register_at(self, url: str, email: str, registration_data: Dict) -> Optional[Dict]:
+        """Try one registration endpoint, result on success else None"""
         try:
-            # Get signup page
-            signup_url = f"{self.base_url}/join/{self.referral_code}"
-            response = self.session.get(signup_url, timeout=30)
+            logger.info(f"Trying registration endpoint: {url}")
             
-            if response.status_code != 200:
-                return {"success": False, "error": "Cannot load signup page"}
+            response = await self._post(url, json=registration_data, timeout=30)
+            
+            # Retry once with the confirmation field if the server asks for
+            # it, and keep sending it to this site from then on
+            if (response.status_code in (400, 422)
+                    and "confirmPassword" not in registration_data
+                    and b"confirm" in response.content.lower()):
+                self._confirm_password_required[self.base_url] = True
+                registration_data = {**registration_data, "confirmPassword": registration_data["password"]}
+                response = await self._post(url, json=registration_data, timeout=30)
             
-            # Look for form fields
-            import re
+            logger.debug(f"Registration response: {response.status_code}")
             
-            # Try to find CSRF token
-            csrf_match = re.search(r'name="[^"]*csrf[^"]*".*?value="([^"]+)"', response.text)
-            csrf_token = csrf_match.group(1) if csrf_match else ""
+            if response.status_code in [200, 201]:
+                # Check response
+                try:
+                    result = json_loads(response.content)
+                except ValueError:
+                    result = None
+                
+                # Check the JSON fields, or the raw body if it is not a JSON object
+                if isinstance(result, dict):
+                    success = _is_success_result(result)
+                else:
+                    success = _has_success_token(response.content)
+                
+                if success:
+                    logger.info(f"Registration successful for {email}")
+                    return {"success": True, "message": "Registration successful"}
+            
+        except Exception as e:
+            logger.debug(f"Endpoint {url} failed: {e}")
+        
+        return None
+    
+    async def _try_direct_registration(self, email: str, password: str) -> Dict:
+        """Try direct form submission as fallback"""
+        try:
+            signup_url = self._signup_url
+            
+            # Get signup page unless a token from an earlier account is cached
+            if self.csrf_token is None:
+                csrf_token = await self._fetch_csrf_token(signup_url)
+                
+                if csrf_token is None:
+                    return {"success": False, "error": "Cannot load signup page"}
+                
+                self.csrf_token = csrf_token
+            
+            csrf_token = self.csrf_token
             
             # Prepare form data
             form_data = {
@@ -181,7 +261,7 @@ class ReferralBot:
             }
             
             # Try to submit
-            submit_response = self.session.post(
+            submit_response = await self._post(
                 signup_url,
                 data=form_data,
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -189,42 +269,59 @@ class ReferralBot:
             )
             
             if submit_response.status_code == 200:
-                if "success" in submit_response.text.lower() or "verify" in submit_response.text.lower():
+                if _has_success_token(submit_response.content):
                     return {"success": True, "message": "Registration via form successful"}
             
+            # The token may have rotated, fetch a fresh one next time
+            self.csrf_token = None
             return {"success": False, "error": "Direct registration failed"}
             
         except Exception as e:
             return {"success": False, "error": f"Direct registration error: {str(e)}"}
     
-    def _verify_account(self, email: str, verification_code: str) -> Dict:
-        """Verify account with code"""
+    async def _fetch_csrf_token(self, url: str) -> Optional[str]:
+        """
+        Stream a page until its CSRF token shows up, then drop the rest
+        
+        Returns:
+            The token, "" if the page has none, None if it failed to load
+        """
+        response = await self._send("GET", url, stream=True, timeout=30)
         try:
-            verify_endpoints = [
-                "/api/auth/verify",
-                "/api/verify",
-                "/auth/verify"
-            ]
+            if response.status_code != 200:
+                return None
+            
+            buffer = b""
+            async for chunk in response.aiter_bytes(chunk_size=8192):
+                buffer += chunk
+                csrf_match = _CSRF_RE.search(buffer)
+                if csrf_match:
+                    return csrf_match.group(1).decode()
+                
+                # Only the last, possibly unfinished tag can still match
+                start = buffer.rfind(b"<")
+                buffer = buffer[start:][-_CSRF_MAX_TAG:] if start >= 0 else b""
             
+            return ""
+        finally:
+            await response.aclose()
+    
+    async def _verify_account(self, email: str, verification_code: str) -> Dict:
+        """Verify account with code"""
+        try:
             verify_data = {
                 "email": email,
                 "code": verification_code
             }
             
-            for endpoint in verify_endpoints:
-                try:
-                    response = self.session.post(
-                        urljoin(self.base_url, endpoint),
-                        json=verify_data,
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        logger.info(f"Account verified: {email}")
-                        return {"success": True, "message": "Account verified"}
-                        
-                except:
-                    continue
+            _, verified = await race_endpoints(
+                self._verify_url_cache, self.base_url, self._verify_urls,
+                lambda url: self._verify_at(url, verify_data)
+            )
+            
+            if verified:
+                logger.info(f"Account verified: {email}")
+                return {"success": True, "message": "Account verified"}
             
             return {"success": False, "error": "Verification failed"}
             
@@ -232,45 +329,100 @@ class ReferralBot:
             logger.error(f"Verification error: {e}")
             return {"success": False, "error": str(e)}
     
-    def create_multiple_accounts(self, count: int = 5) -> list:
-        """Create multiple accounts"""
-        results = []
+    async def _verify_at(self, url: str, verify_data: Dict) -> bool:
+        """Try one verification endpoint"""
+        try:
+            response = await self._post(url, json=verify_data, timeout=30)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    async def create_multiple_accounts(self, count: int = 5, concurrency: int = 1,
+                                       on_result: Callable[[Dict], None] = None) -> list:
+        """
+        Create multiple accounts concurrently
         
-        for i in range(count):
-            logger.info(f"Creating account {i+1}/{count}")
-            
-            result = self.create_account()
-            results.append(result)
-            
-            # Save progress
-            self._save_progress(results)
-            
-            # Delay between accounts
-            if i < count - 1:
-                time.sleep(self._get_config_delay())
+        Args:
+            count: Number of accounts to create
+            concurrency: Accounts in flight at once
+            on_result: Called with each result as soon as it is ready
+        
+        Returns:
+            Results in creation order
+        """
+        concurrency = max(1, concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        delay = self._get_config_delay()
+        progress = {"total": 0, "successful": 0}
+        os.makedirs(os.path.dirname(self.PROGRESS_PATH), exist_ok=True)
+        
+        # Accounts queue their progress lines for one writer task
+        queue: asyncio.Queue = asyncio.Queue()
+        writer = asyncio.create_task(self._progress_writer(queue))
+        
+        async def create(i: int) -> Dict:
+            async with semaphore:
+                logger.info(f"Creating account {i+1}/{count}")
+                
+                try:
+                    # Own bot per account: in-flight accounts never share the
+                    # session cookies and CSRF token between register and verify
+                    bot = type(self)(self.referral_code, self.base_gmail, self.code_provider, self.client)
+                    result = await bot.create_account()
+                except Exception as e:
+                    logger.error(f"Error creating account: {e}")
+                    result = {"success": False, "error": str(e)}
+                
+                progress["total"] += 1
+                progress["successful"] += bool(result.get("success"))
+                if on_result:
+                    on_result(result)
+                
+                # Save progress
+                await queue.put({
+                    "created_at": datetime.now().isoformat(),
+                    **progress,
+                    "result": result
+                })
+                
+                # Keep this slot idle before its next account; other
+                # slots keep working meanwhile
+                if i < count - concurrency:
+                    await asyncio.sleep(delay)
+                
+                return result
         
+        try:
+            results = await asyncio.gather(*(create(i) for i in range(count)))
+        finally:
+            # Sentinel: the writer finishes the queue, then closes the file
+            await queue.put(None)
+            await writer
+        
+        logger.info(f"Created {progress['successful']}/{progress['total']} accounts")
         return results
     
-    def _save_progress(self, results: list):
-        """Save progress to file"""
+    async def _progress_writer(self, queue: asyncio.Queue):
+        """Append queued progress records to the JSON Lines log until a None sentinel"""
         try:
-            with open("data/account_progress.json", "w") as f:
-                json.dump({
-                    "created_at": datetime.now().isoformat(),
-                    "total": len(results),
-                    "successful": sum(1 for r in results if r.get("success")),
-                    "results": results
-                }, f, indent=2)
-        except:
-            pass
+            with open(self.PROGRESS_PATH, "a") as f:
+                while True:
+                    record = await queue.get()
+                    if record is None:
+                        return
+                    
+                    f.write(json_dumps(record) + "\n")
+                    # Flush once per burst of results, not per line
+                    if queue.empty():
+                        f.flush()
+        except OSError as e:
+            logger.warning(f"Progress log not written: {e}")
     
     def _get_config_delay(self) -> int:
-        """Get delay from config"""
+        """Get delay from the cached config"""
         try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-                return config.get("delay_between_accounts", 10)
-        except:
+            return load_config().get("delay_between_accounts", 10)
+        except Exception:
             return 10
 
 if __name__ == "__main__":
@@ -284,6 +436,6 @@ if __name__ == "__main__":
         referral_code = "NPH90834"
         base_gmail = None
     
-    bot = ReferralBot(referral_code, base_gmail)
-    result = bot.create_account()
+    bot = AsyncReferralBot(referral_code, base_gmail)
+    result = run(bot.create_account())
     print(json.dumps(result, indent=2))
\ No newline at end of file
@@ -15,7 +15,7 @@ pkg install -y python git curl
 # Install Python packages
 echo "🐍 Installing Python packages..."
 pip install --upgrade pip
-pip install requests beautifulsoup4 fake-useragent colorama schedule
+pip install httpx beautifulsoup4 fake-useragent colorama schedule
 
 # Create bot directory
 echo "📁 Creating bot directory..."
@@ -28,7 +28,7 @@ echo "📄 Creating bot files..."
 
 # Create requirements.txt
 cat > requirements.txt << 'EOF'
-requests>=2.31.0
+httpx>=0.25.0
 beautifulsoup4>=4.12.0
 fake-useragent>=1.4.0
 colorama>=0.4.6
@@ -3,35 +3,98 @@
 Task Bot - Completes daily tasks to earn points
 """
 
-import requests
+import httpx
 import time
+import functools
+import asyncio
 import random
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urljoin
+from typing import Awaitable, Callable, ClassVar, Dict, List, Optional, Tuple
+
+from http_client import AccountSession, run
+from utils import json_loads, load_config, race_endpoints
 
 logger = logging.getLogger(__name__)
 
-class TaskBot:
+try:
+    from prometheus_client import Histogram
+    TASK_SECONDS = Histogram(
+        "sosovalue_task_seconds", "Time spent on one daily task",
+        ["task", "outcome"]
+    )
+except ImportError:  # optional, durations are still logged at DEBUG
+    TASK_SECONDS = None
+
+def _task_step(xp_key: str, label: str):
+    """
+    Wrap a complete_* coroutine with the shared logging, error handling and timing
+    
+    The wrapped coroutine only does the task's work; the wrapper returns
+    (True, xp from task_xp[xp_key]) when it finishes, (False, 0) if it raises.
+    """
+    def decorator(func: Callable[["TaskBot"], Awaitable[None]]):
+        @functools.wraps(func)
+        async def wrapper(self: "TaskBot") -> Tuple[bool, int]:
+            logger.info(f"Completing {label.lower()}...")
+            start = time.perf_counter()
+            outcome = "error"
+            
+            try:
+                await func(self)
+                outcome = "success"
+                
+                xp = self.task_xp.get(xp_key, 0)
+                logger.info(f"{label} completed! Earned {xp} XP")
+                return True, xp
+                
+            except Exception as e:
+                logger.error(f"{label} error: {e}")
+                return False, 0
+            
+            finally:
+                elapsed = time.perf_counter() - start
+                logger.debug(f"{label} took {elapsed:.2f}s")
+                if TASK_SECONDS is not None:
+                    TASK_SECONDS.labels(task=xp_key, outcome=outcome).observe(elapsed)
+        
+        return wrapper
+    return decorator
+
+class TaskBot(AccountSession):
     """Automates SoSoValue daily tasks"""
     
-    def __init__(self, base_url: str = "https://www.sosovalue.com"):
-        self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Content-Type": "application/json"
-        })
+    # Candidate login endpoints, raced until one works
+    LOGIN_ENDPOINTS = (
+        "/api/auth/login",
+        "/api/login",
+        "/auth/login"
+    )
+    
+    # Winning login URL by base_url, shared by all bots
+    _login_url_cache: ClassVar[Dict[str, str]] = {}
+    
+    def __init__(self, base_url: str = "https://www.sosovalue.com",
+                 client: httpx.AsyncClient = None):
+        self.base_url = base_url.rstrip("/")
+        # Full candidate URLs, built once instead of on every login
+        self._login_urls = [f"{self.base_url}{endpoint}" for endpoint in self.LOGIN_ENDPOINTS]
+        # Pooled client shared with other bots (None: the loop's shared
+        # one); the login token and cookies stay on this bot so accounts
+        # never mix
+        self.client = client
+        self.headers = {}
+        self.cookies = httpx.Cookies()
         
-        # Load task XP values from config
+        # Load task XP values and timed-task durations from config
         self.task_xp = self._load_task_xp()
+        self.task_durations = self._load_task_durations()
+        # Random pauses around the instant tasks, off unless configured
+        self.simulate = self._load_simulate()
     
     def _load_task_xp(self) -> Dict:
-        """Load XP values from config"""
+        """Load XP values from the cached config"""
         default_xp = {
             "checkin": 10,
             "video": 5,
@@ -43,16 +106,43 @@ class TaskBot:
         }
         
         try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-                task_settings = config.get("task_settings", {})
-                default_xp.update(task_settings)
-        except:
+            default_xp.update(load_config().get("task_settings", {}))
+        except Exception:
             pass
         
         return default_xp
     
-    def login(self, email: str, password: str) -> bool:
+    def _load_task_durations(self) -> Dict:
+        """Load video/article watch times (seconds) from the cached config"""
+        durations = {
+            "video": 65,
+            "article": 60
+        }
+        
+        try:
+            durations.update(load_config().get("task_durations", {}))
+        except Exception:
+            pass
+        
+        return durations
+    
+    def _load_simulate(self) -> bool:
+        """Whether to pad tasks with human-like pauses (config simulate_human_delay)"""
+        try:
+            return bool(load_config().get("simulate_human_delay", False))
+        except Exception:
+            return False
+    
+    async def _human_delay(self, low: float, high: float):
+        """Random pause, only when simulate_human_delay is enabled"""
+        if self.simulate:
+            await asyncio.sleep(random.uniform(low, high))
+    
+    async def _wait_until(self, deadline: float):
+        """Sleep until a time.monotonic() deadline, other accounts run meanwhile"""
+        await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+    
+    async def login(self, email: str, password: str) -> bool:
         """Login to SoSoValue"""
         try:
             login_data = {
@@ -61,37 +151,19 @@ class TaskBot:
                 "remember": True
             }
             
-            # Try common login endpoints
-            endpoints = [
-                "/api/auth/login",
-                "/api/login",
-                "/auth/login"
-            ]
+            # Race the common login endpoints, earliest 200 wins
+            _, result = await race_endpoints(
+                self._login_url_cache, self.base_url, self._login_urls,
+                lambda url: self._login_at(url, login_data)
+            )
             
-            for endpoint in endpoints:
-                try:
-                    response = self.session.post(
-                        urljoin(self.base_url, endpoint),
-                        json=login_data,
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        # Save token if present
-                        try:
-                            result = response.json()
-                            if result.get("token"):
-                                self.session.headers.update({
-                                    "Authorization": f"Bearer {result['token']}"
-                                })
-                        except:
-                            pass
-                        
-                        logger.info(f"Login successful: {email}")
-                        return True
-                        
-                except:
-                    continue
+            if result:
+                # Save token if present
+                if isinstance(result, str):
+                    self.headers["Authorization"] = f"Bearer {result}"
+                
+                logger.info(f"Login successful: {email}")
+                return True
             
             logger.warning(f"Login failed for {email}")
             return False
@@ -100,145 +172,141 @@ class TaskBot:
             logger.error(f"Login error: {e}")
             return False
     
-    def complete_checkin(self) -> Tuple[bool, int]:
-        """Complete daily check-in"""
-        logger.info("Completing daily check-in...")
-        
+    async def _login_at(self, url: str, login_data: Dict):
+        """Try one login endpoint: token (or True without one) on 200, else None"""
         try:
-            # Simulate API call
-            time.sleep(random.uniform(1, 2))
-            
-            # Mark as completed
-            xp = self.task_xp.get("checkin", 10)
-            logger.info(f"Check-in completed! Earned {xp} XP")
-            return True, xp
+            response = await self._send("POST", url, json=login_data, timeout=30)
             
-        except Exception as e:
-            logger.error(f"Check-in error: {e}")
-            return False, 0
+            if response.status_code == 200:
+                try:
+                    result = json_loads(response.content)
+                except ValueError:
+                    return True
+                
+                if isinstance(result, dict) and result.get("token"):
+                    return result["token"]
+                return True
+                    
+        except Exception:
+            pass
+        
+        return None
     
-    def complete_watch_video(self) -> Tuple[bool, int]:
+    @_task_step("checkin", "Check-in")
+    async def complete_checkin(self):
+        """Complete daily check-in"""
+        # Simulate API call
+        await self._human_delay(1, 2)
+    
+    @_task_step("video", "Video task")
+    async def complete_watch_video(self):
         """Complete video watching task"""
-        logger.info("Completing watch video task...")
+        # Deadline from the start, so any setup counts toward the watch time
+        duration = self.task_durations["video"]
+        deadline = time.monotonic() + duration
         
-        try:
-            # Simulate watching video (65 seconds)
-            logger.info("Simulating video watch (65 seconds)...")
-            time.sleep(65)
-            
-            # Mark as completed
-            xp = self.task_xp.get("video", 5)
-            logger.info(f"Video task completed! Earned {xp} XP")
-            return True, xp
-            
-        except Exception as e:
-            logger.error(f"Video task error: {e}")
-            return False, 0
+        # Simulate watching video
+        logger.info(f"Simulating video watch ({duration} seconds)...")
+        await self._wait_until(deadline)
     
-    def complete_read_article(self) -> Tuple[bool, int]:
+    @_task_step("article", "Article task")
+    async def complete_read_article(self):
         """Complete article reading task"""
-        logger.info("Completing read article task...")
+        duration = self.task_durations["article"]
+        deadline = time.monotonic() + duration
         
-        try:
-            # Simulate reading article (60 seconds)
-            logger.info("Simulating article read (60 seconds)...")
-            time.sleep(60)
-            
-            # Mark as completed
-            xp = self.task_xp.get("article", 3)
-            logger.info(f"Article task completed! Earned {xp} XP")
-            return True, xp
-            
-        except Exception as e:
-            logger.error(f"Article task error: {e}")
-            return False, 0
+        # Simulate reading article
+        logger.info(f"Simulating article read ({duration} seconds)...")
+        await self._wait_until(deadline)
     
-    def complete_share(self) -> Tuple[bool, int]:
+    @_task_step("share", "Share task")
+    async def complete_share(self):
         """Complete share task"""
-        logger.info("Completing share task...")
-        
-        try:
-            # Simulate sharing
-            time.sleep(random.uniform(1, 2))
-            
-            # Mark as completed
-            xp = self.task_xp.get("share", 5)
-            logger.info(f"Share task completed! Earned {xp} XP")
-            return True, xp
-            
-        except Exception as e:
-            logger.error(f"Share task error: {e}")
-            return False, 0
+        # Simulate sharing
+        await self._human_delay(1, 2)
     
-    def complete_like(self) -> Tuple[bool, int]:
+    @_task_step("like", "Like task")
+    async def complete_like(self):
         """Complete like task"""
-        logger.info("Completing like task...")
-        
-        try:
-            # Simulate liking
-            time.sleep(random.uniform(0.5, 1.5))
-            
-            # Mark as completed
-            xp = self.task_xp.get("like", 1)
-            logger.info(f"Like task completed! Earned {xp} XP")
-            return True, xp
-            
-        except Exception as e:
-            logger.error(f"Like task error: {e}")
-            return False, 0
+        # Simulate liking
+        await self._human_delay(0.5, 1.5)
     
-    def complete_follow(self) -> Tuple[bool, int]:
+    @_task_step("follow", "Follow task")
+    async def complete_follow(self):
         """Complete follow task"""
-        logger.info("Completing follow task...")
-        
-        try:
-            # Simulate following
-            time.sleep(random.uniform(1, 2))
-            
-            # Mark as completed
-            xp = self.task_xp.get("follow", 3)
-            logger.info(f"Follow task completed! Earned {xp} XP")
-            return True, xp
-            
-        except Exception as e:
-            logger.error(f"Follow task error: {e}")
-            return False, 0
+        # Simulate following
+        await self._human_delay(1, 2)
     
-    def complete_profile_update(self) -> Tuple[bool, int]:
+    @_task_step("profile", "Profile update")
+    async def complete_profile_update(self):
         """Complete profile update task"""
-        logger.info("Completing profile update...")
-        
-        try:
-            # Simulate profile update
-            time.sleep(random.uniform(1, 2))
-            
-            # Mark as completed
-            xp = self.task_xp.get("profile", 4)
-            logger.info(f"Profile update completed! Earned {xp} XP")
-            return True, xp
-            
-        except Exception as e:
-            logger.error(f"Profile update error: {e}")
-            return False, 0
+        # Simulate profile update
+        await self._human_delay(1, 2)
     
-    def complete_all_tasks(self, email: str, password: str = None) -> Dict:
-        """Complete all daily tasks for an account"""
-        logger.info(f"Starting tasks for: {email}")
+    async def _run_task(self, task_name: str, task_func) -> Tuple[bool, int]:
+        """Run one task, after a small start jitter when simulating"""
+        logger.info(f"Starting task: {task_name}")
+        await self._human_delay(1, 3)
+        return await task_func()
+    
+    async def complete_all_tasks(self, email: str, password: str = None) -> Dict:
+        """Complete all daily tasks for an account (password looked up if missing)"""
+        results = await self.complete_all_tasks_batch({email: password}, concurrency=1)
+        return results[0]
+    
+    async def complete_all_tasks_batch(self, credentials: Dict[str, Optional[str]],
+                                       concurrency: int = 3) -> List[Dict]:
+        """
+        Complete daily tasks for many accounts concurrently
+        
+        Missing passwords are looked up in the database with one query. Each
+        account runs on its own bot sharing this one's client, so login
+        tokens and cookies never mix.
+        
+        Args:
+            credentials: email -> password (None or "" to look it up)
+            concurrency: Accounts in flight at once
         
-        # If password not provided, try to get from database
-        if not password:
+        Returns:
+            Results in credentials order
+        """
+        missing = [email for email, password in credentials.items() if not password]
+        if missing:
             from account_manager import AccountManager
-            manager = AccountManager()
-            account = manager.get_account_by_email(email)
-            
-            if not account:
-                return {"success": False, "error": "Account not found"}
+            credentials = {**credentials, **AccountManager.instance().get_passwords(missing)}
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        total = len(credentials)
+        log = logger.info
+        
+        async def process(i: int, email: str, password: Optional[str]) -> Dict:
+            if not password:
+                return {"success": False, "email": email, "error": "Account not found"}
             
-            password = account["password"]
-            manager.close()
+            async with semaphore:
+                # Jitter spreads out starts instead of a serial 5s gap
+                if total > 1:
+                    await asyncio.sleep(random.uniform(0, 5))
+                
+                try:
+                    log("Processing account %d/%d: %s", i + 1, total, email)
+                    bot = type(self)(self.base_url, self.client)
+                    return await bot._run_account(email, password)
+                    
+                except Exception as e:
+                    logger.error("Error processing %s: %s", email, e)
+                    return {"email": email, "error": str(e)}
+        
+        return await asyncio.gather(
+            *(process(i, email, password) for i, (email, password) in enumerate(credentials.items()))
+        )
+    
+    async def _run_account(self, email: str, password: str) -> Dict:
+        """Login and complete all daily tasks for one account on this bot"""
+        logger.info(f"Starting tasks for: {email}")
         
         # Login first
-        if not self.login(email, password):
+        if not await self.login(email, password):
             return {"success": False, "error": "Login failed"}
         
         # List of tasks to complete
@@ -255,36 +323,33 @@ class TaskBot:
         results = {}
         total_xp = 0
         
-        for task_name, task_func in tasks:
-            try:
-                logger.info(f"Starting task: {task_name}")
-                
-                # Random delay before task
-                time.sleep(random.uniform(1, 3))
-                
-                # Execute task
-                success, xp = task_func()
-                
-                results[task_name] = {
-                    "success": success,
-                    "xp": xp,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                if success:
-                    total_xp += xp
-                
-                # Random delay between tasks
-                if task_name != tasks[-1][0]:
-                    delay = random.uniform(2, 5)
-                    time.sleep(delay)
-                    
-            except Exception as e:
-                logger.error(f"Task {task_name} failed: {e}")
+        # Tasks are independent, so they run side by side and the account
+        # takes about as long as its longest task (the video)
+        outcomes = await asyncio.gather(
+            *(self._run_task(task_name, task_func) for task_name, task_func in tasks),
+            return_exceptions=True
+        )
+        
+        for (task_name, _), outcome in zip(tasks, outcomes):
+            # BaseException: a cancelled task comes back as CancelledError
+            if isinstance(outcome, BaseException):
+                error = str(outcome) or type(outcome).__name__
+                logger.error(f"Task {task_name} failed: {error}")
                 results[task_name] = {
                     "success": False,
-                    "error": str(e)
+                    "error": error
                 }
+                continue
+            
+            success, xp = outcome
+            results[task_name] = {
+                "success": success,
+                "xp": xp,
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            if success:
+                total_xp += xp
         
         logger.info(f"All tasks completed! Total XP: {total_xp}")
         
@@ -298,9 +363,9 @@ class TaskBot:
 
 # Quick task completion function
 def quick_tasks(email: str, password: str) -> Dict:
-    """Quick completion of main tasks"""
+    """Quick completion of main tasks (blocking wrapper)"""
     bot = TaskBot()
-    return bot.complete_all_tasks(email, password)
+    return run(bot.complete_all_tasks(email, password))
 
 if __name__ == "__main__":
     # Test the task bot
@@ -310,8 +375,7 @@ if __name__ == "__main__":
         email = sys.argv[1]
         password = sys.argv[2]
         
-        bot = TaskBot()
-        result = bot.complete_all_tasks(email, password)
+        result = quick_tasks(email, password)
         print(json.dumps(result, indent=2))
     else:
         print("Usage: python task_bot.py <email> <password>")
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""Shared test setup: import path for the flat top-level modules, fixtures"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client  # noqa: E402
+from http_client import RateLimiter  # noqa: E402
+
+
+@pytest.fixture
+def no_limiter(monkeypatch):
+    """Replace the shared rate limiter with one that never makes a test wait"""
+    monkeypatch.setattr(http_client, "SHARED_LIMITER", RateLimiter(rate=1000.0))
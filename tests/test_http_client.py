@@ -0,0 +1,266 @@
+"""Tests for http_client: Retry-After parsing, the rate limiter and send()"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+import http_client
+from http_client import RateLimiter, parse_retry_after
+
+
+class FakeClock:
+    """Stands in for http_client.time; sleeping advances it"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client, "time", clock)
+    monkeypatch.setattr(http_client, "_sleep", clock.sleep)
+    return clock
+
+
+# parse_retry_after
+
+def test_retry_after_seconds():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("0.5") == 0.5
+
+
+def test_retry_after_negative_is_zero():
+    assert parse_retry_after("-3") == 0.0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon"])
+def test_retry_after_missing_or_invalid(value):
+    assert parse_retry_after(value) is None
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(when, usegmt=True)) == pytest.approx(30, abs=2)
+
+
+def test_retry_after_http_date_in_past_is_zero():
+    when = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert parse_retry_after(format_datetime(when, usegmt=True)) == 0.0
+
+
+# RateLimiter
+
+def test_limiter_halves_on_429_down_to_min_rate(clock):
+    limiter = RateLimiter(rate=8.0, min_rate=1.5)
+
+    rates = []
+    for _ in range(4):
+        limiter.record("a", 429)
+        rates.append(limiter._buckets["a"].rate)
+
+    assert rates == [4.0, 2.0, 1.5, 1.5]
+
+
+def test_limiter_doubles_after_ten_consecutive_2xx_up_to_rate(clock):
+    limiter = RateLimiter(rate=8.0, recover_after=10)
+    limiter.record("a", 429)
+    limiter.record("a", 429)
+    bucket = limiter._buckets["a"]
+
+    for _ in range(9):
+        limiter.record("a", 200)
+    assert bucket.rate == 2.0
+
+    limiter.record("a", 201)
+    assert bucket.rate == 4.0
+
+    for _ in range(20):
+        limiter.record("a", 204)
+    assert bucket.rate == 8.0
+
+
+def test_limiter_streak_is_broken_by_other_statuses(clock):
+    limiter = RateLimiter(rate=8.0, recover_after=10)
+    limiter.record("a", 429)
+
+    for _ in range(9):
+        limiter.record("a", 200)
+    limiter.record("a", 500)
+    limiter.record("a", 200)
+
+    assert limiter._buckets["a"].rate == 4.0
+
+
+def test_limiter_hosts_are_independent(clock):
+    limiter = RateLimiter(rate=8.0)
+    limiter.record("a", 429)
+    limiter.record("b", 200)
+
+    assert limiter._buckets["a"].rate == 4.0
+    assert limiter._buckets["b"].rate == 8.0
+
+
+def test_limiter_burst_then_negative_balance_reservation(clock):
+    limiter = RateLimiter(rate=2.0)
+
+    async def take(n):
+        for _ in range(n):
+            await limiter.acquire("a")
+
+    # Two tokens of burst are free; each later caller waits one more slot
+    asyncio.run(take(2))
+    assert clock.sleeps == []
+
+    asyncio.run(take(1))
+    assert clock.sleeps == [0.5]
+
+
+def test_limiter_reserves_queue_for_concurrent_callers(clock, monkeypatch):
+    limiter = RateLimiter(rate=2.0)
+    waits = []
+
+    # Callers arriving at the same instant: sleeping leaves the clock alone
+    async def record_sleep(delay):
+        waits.append(delay)
+    monkeypatch.setattr(http_client, "_sleep", record_sleep)
+
+    async def main():
+        for _ in range(5):
+            await limiter.acquire("a")
+
+    asyncio.run(main())
+    assert waits == [0.5, 1.0, 1.5]
+
+
+def test_limiter_refills_over_time(clock):
+    limiter = RateLimiter(rate=2.0)
+
+    async def main():
+        await limiter.acquire("a")
+        await limiter.acquire("a")
+        clock.now += 1.0
+        await limiter.acquire("a")
+        await limiter.acquire("a")
+
+    asyncio.run(main())
+    assert clock.sleeps == []
+
+
+# send(): 429 retries and budget
+
+def _client(statuses, headers=None):
+    """Mock client answering with the given statuses in order"""
+    calls = []
+
+    def handler(request):
+        status = statuses[min(len(calls), len(statuses) - 1)]
+        calls.append(request)
+        return httpx.Response(status, headers=headers or {}, json={})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+def _send(client):
+    async def main():
+        async with client:
+            return await http_client.send(client, "GET", "http://site.test/x")
+    return asyncio.run(main())
+
+
+def test_send_waits_retry_after_then_succeeds(clock, no_limiter):
+    client, calls = _client([429, 429, 200], headers={"Retry-After": "2"})
+
+    response = _send(client)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert clock.sleeps == [2.0, 2.0]
+
+
+def test_send_gives_up_after_max_retries(clock, no_limiter):
+    client, calls = _client([429], headers={"Retry-After": "1"})
+
+    response = _send(client)
+
+    assert response.status_code == 429
+    assert len(calls) == http_client.MAX_RATE_LIMIT_RETRIES + 1
+    assert clock.sleeps == [1.0] * http_client.MAX_RATE_LIMIT_RETRIES
+
+
+def test_send_stops_when_wait_budget_would_be_exceeded(clock, no_limiter):
+    client, calls = _client([429], headers={"Retry-After": "100"})
+
+    response = _send(client)
+
+    # 100s fits the 120s budget, a second 100s does not
+    assert response.status_code == 429
+    assert len(calls) == 2
+    assert clock.sleeps == [100.0]
+
+
+def test_send_backs_off_exponentially_without_retry_after(clock, no_limiter, monkeypatch):
+    monkeypatch.setattr(http_client.random, "uniform", lambda low, high: 0.0)
+    client, calls = _client([429, 429, 429, 200])
+
+    response = _send(client)
+
+    assert response.status_code == 200
+    assert clock.sleeps == [1, 2, 4]
+
+
+def test_send_feeds_statuses_to_the_limiter(clock, monkeypatch):
+    limiter = RateLimiter(rate=8.0)
+    monkeypatch.setattr(http_client, "SHARED_LIMITER", limiter)
+    client, _ = _client([429, 200], headers={"Retry-After": "0"})
+
+    _send(client)
+
+    bucket = limiter._buckets["site.test"]
+    assert bucket.rate == 4.0
+    assert bucket.streak == 1
+
+
+# send(): redirects
+
+def test_send_carries_caller_cookies_across_redirects(no_limiter):
+    seen = {}
+
+    def handler(request):
+        seen[request.url.path] = request.headers.get("Cookie")
+        if request.url.path == "/a":
+            return httpx.Response(302, headers={
+                "Location": "/b",
+                "Set-Cookie": "step=1; Path=/"
+            })
+        return httpx.Response(200, json={})
+
+    jar = httpx.Cookies()
+    jar.set("sess", "abc", domain="site.test")
+
+    async def main():
+        client = http_client._build_client()
+        client._transport = httpx.MockTransport(handler)
+        async with client:
+            response = await http_client.send(client, "GET", "http://site.test/a", cookies=jar)
+            return response, client
+
+    response, client = asyncio.run(main())
+
+    assert response.status_code == 200
+    assert [r.status_code for r in response.history] == [302]
+    assert seen == {"/a": "sess=abc", "/b": "sess=abc; step=1"}
+    assert jar.get("step") == "1"
+    # The shared client never keeps an account's cookies
+    assert not list(client.cookies.jar)
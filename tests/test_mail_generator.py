@@ -0,0 +1,125 @@
+"""Tests for the Gmail dot trick helpers in mail_generator"""
+
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+import mail_generator
+from mail_generator import (
+    _insert_dots, _random_dot_mask, generate_multiple_variations, prompt_code_provider
+)
+
+
+@pytest.mark.parametrize("gaps", [1, 2, 3, 7, 20])
+def test_dot_mask_sets_one_to_three_bits_below_gaps(gaps):
+    random.seed(gaps)
+
+    for _ in range(500):
+        mask = _random_dot_mask(gaps)
+        assert 0 < mask < 2 ** gaps
+        assert 1 <= bin(mask).count("1") <= min(3, gaps)
+
+
+def test_dot_mask_uses_every_position():
+    random.seed(1)
+
+    seen = 0
+    for _ in range(500):
+        seen |= _random_dot_mask(5)
+
+    assert seen == 0b11111
+
+
+@pytest.mark.parametrize("mask, expected", [
+    (0b0, "abcd"),
+    (0b001, "a.bcd"),
+    (0b010, "ab.cd"),
+    (0b100, "abc.d"),
+    (0b101, "a.bc.d"),
+    (0b111, "a.b.c.d"),
+])
+def test_insert_dots(mask, expected):
+    assert _insert_dots("abcd", mask) == expected
+
+
+def test_variations_never_start_end_or_double_dot():
+    random.seed(7)
+
+    for email in generate_multiple_variations("johnbull@gmail.com", 200):
+        local_part, domain = email.split("@")
+        assert domain == "gmail.com"
+        assert local_part.replace(".", "") == "johnbull"
+        assert not local_part.startswith(".") and not local_part.endswith(".")
+        assert ".." not in local_part
+        assert 1 <= local_part.count(".") <= 3
+
+
+# prompt_code_provider
+
+@pytest.fixture
+def blocking_prompt(monkeypatch):
+    """get_verification_code that blocks its thread until answer is set"""
+    answer = threading.Event()
+    prompts = []
+
+    def fake_prompt(email):
+        prompts.append(email)
+        answer.wait(5)
+        return "123456"
+
+    monkeypatch.setattr(mail_generator, "get_verification_code", fake_prompt)
+    return answer, prompts
+
+
+def test_prompt_keeps_event_loop_running(blocking_prompt):
+    answer, _ = blocking_prompt
+    ticks = []
+
+    async def other_account():
+        for i in range(5):
+            ticks.append(i)
+            await asyncio.sleep(0.01)
+        answer.set()
+
+    async def main():
+        code, _ = await asyncio.gather(prompt_code_provider("a@gmail.com"), other_account())
+        return code
+
+    assert asyncio.run(main()) == "123456"
+    assert ticks == [0, 1, 2, 3, 4]
+
+
+def test_prompts_do_not_overlap(blocking_prompt):
+    answer, prompts = blocking_prompt
+
+    async def main():
+        first = asyncio.create_task(prompt_code_provider("a@gmail.com"))
+        second = asyncio.create_task(prompt_code_provider("b@gmail.com"))
+        await asyncio.sleep(0.05)
+        assert prompts == ["a@gmail.com"]
+        answer.set()
+        return await first, await second
+
+    assert asyncio.run(main()) == ("123456", "123456")
+    assert prompts == ["a@gmail.com", "b@gmail.com"]
+
+
+def test_cancelled_prompt_returns_at_once(blocking_prompt):
+    answer, _ = blocking_prompt
+
+    async def main():
+        task = asyncio.create_task(prompt_code_provider("a@gmail.com"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        start = time.monotonic()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return time.monotonic() - start
+
+    try:
+        assert asyncio.run(main()) < 1
+    finally:
+        answer.set()
@@ -0,0 +1,77 @@
+"""Tests for AsyncReferralBot's streamed CSRF token lookup"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from referral_bot import AsyncReferralBot
+
+CHUNK = 8192
+
+pytestmark = pytest.mark.usefixtures("no_limiter")
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    """Response body served in fixed chunks, counting how many were read"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def _fetch(body, status=200):
+    """Run _fetch_csrf_token against a page; returns (token, stream)"""
+    chunks = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)]
+    stream = ChunkedStream(chunks)
+
+    def handler(request):
+        return httpx.Response(status, stream=stream)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            bot = AsyncReferralBot(client=client)
+            return await bot._fetch_csrf_token(bot._signup_url)
+
+    return asyncio.run(main()), stream
+
+
+def _page(prefix_len, tag=b'<input type="hidden" name="csrf_token" value="TOK123">'):
+    """Page with tag starting at prefix_len, followed by more filler"""
+    prefix = b" " * prefix_len
+    return prefix + tag + b"<p>filler</p>" * 3000
+
+
+def test_token_in_first_chunk():
+    token, _ = _fetch(_page(100))
+    assert token == "TOK123"
+
+
+@pytest.mark.parametrize("split", [1, 10, 30, 45, 50])
+def test_token_split_across_chunk_boundary(split):
+    # The tag starts split bytes before the 8 KB boundary
+    token, _ = _fetch(_page(CHUNK - split))
+    assert token == "TOK123"
+
+
+def test_stops_reading_once_token_found():
+    token, stream = _fetch(_page(CHUNK - 20))
+    assert token == "TOK123"
+    assert stream.read == 2
+    assert len(stream.chunks) > 2
+
+
+def test_page_without_token():
+    token, stream = _fetch(b"<html>" + b"<p>filler</p>" * 3000 + b"</html>")
+    assert token == ""
+    assert stream.read == len(stream.chunks)
+
+
+def test_failed_page_load():
+    token, _ = _fetch(_page(100), status=503)
+    assert token is None
@@ -0,0 +1,97 @@
+"""Tests for utils.first_successful and race_endpoints"""
+
+import asyncio
+
+from utils import first_successful, race_endpoints
+
+
+async def _answer(delay, result, finished=None):
+    await asyncio.sleep(delay)
+    if isinstance(result, Exception):
+        raise result
+    if finished is not None:
+        finished.append(result)
+    return result
+
+
+def _race(attempts):
+    async def main():
+        return await first_successful({key: attempt() for key, attempt in attempts.items()})
+    return asyncio.run(main())
+
+
+def test_earlier_success_beats_faster_later_one():
+    assert _race({
+        "/api/login": lambda: _answer(0.05, "token"),
+        "/auth/login": lambda: _answer(0, True),
+    }) == ("/api/login", "token")
+
+
+def test_later_success_taken_once_earlier_ones_fail():
+    assert _race({
+        "a": lambda: _answer(0.02, None),
+        "b": lambda: _answer(0.01, ValueError("boom")),
+        "c": lambda: _answer(0, "ok"),
+    }) == ("c", "ok")
+
+
+def test_all_failing():
+    assert _race({
+        "a": lambda: _answer(0, False),
+        "b": lambda: _answer(0, RuntimeError()),
+    }) == (None, None)
+
+
+def test_later_attempts_cancelled_once_winner_known():
+    finished = []
+
+    assert _race({
+        "a": lambda: _answer(0, "first", finished),
+        "b": lambda: _answer(0.2, "second", finished),
+    }) == ("a", "first")
+    assert finished == ["first"]
+
+
+def test_attempts_run_concurrently():
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await first_successful({
+            "a": _answer(0.1, None),
+            "b": _answer(0.1, None),
+            "c": _answer(0.1, "ok"),
+        })
+        return result, loop.time() - start
+
+    result, elapsed = asyncio.run(main())
+    assert result == ("c", "ok")
+    assert elapsed < 0.25
+
+
+def test_race_endpoints_remembers_winner():
+    cache = {}
+    tried = []
+
+    async def attempt(url):
+        tried.append(url)
+        return url.endswith("/b") or None
+
+    async def main():
+        first = await race_endpoints(cache, "https://site", ["https://site/a", "https://site/b"], attempt)
+        second = await race_endpoints(cache, "https://site", ["https://site/a", "https://site/b"], attempt)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == ("https://site/b", True)
+    assert cache == {"https://site": "https://site/b"}
+    assert tried == ["https://site/a", "https://site/b", "https://site/b"]
+
+
+def test_race_endpoints_caches_nothing_on_failure():
+    cache = {}
+
+    async def attempt(url):
+        return None
+
+    assert asyncio.run(race_endpoints(cache, "https://site", ["https://site/a"], attempt)) == (None, None)
+    assert cache == {}
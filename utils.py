@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Utils - Helpers shared by the SoSoValue Bot modules
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is the fallback
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = "config.json"
+
+# path -> ((mtime_ns, size), parsed config, raw file bytes)
+_config_cache: Dict[str, Tuple[Tuple[int, int], Dict, bytes]] = {}
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """Change-detection key for a file (None if it does not exist)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def load_config(path: str = CONFIG_PATH) -> Dict:
+    """
+    Load a JSON config file, re-reading it only when it changes on disk
+
+    The returned dict is shared by every caller; copy it before mutating.
+
+    Raises:
+        FileNotFoundError: Config file does not exist
+        ValueError: Config file is not valid JSON
+    """
+    key = _stat_key(path)
+    if key is None:
+        raise FileNotFoundError(path)
+
+    cached = _config_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        data = f.read()
+    config = json_loads(data)
+
+    _config_cache[path] = (key, config, data)
+    return config
+
+def save_config(config: Dict, path: str = CONFIG_PATH) -> bool:
+    """
+    Write config as indented JSON, skipping the write if nothing changed
+
+    The file is swapped in with os.replace, so readers never see a torn file.
+
+    Returns:
+        True if the file was rewritten
+    """
+    data = json_dumps_indent(config)
+
+    cached = _config_cache.get(path)
+    if cached and cached[2] == data and cached[0] == _stat_key(path):
+        return False
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    # Cache a private copy, the caller keeps mutating its own dict
+    _config_cache[path] = (_stat_key(path), json_loads(data), data)
+    return True
+
+def json_dumps(obj) -> str:
+    """Serialize obj to a compact JSON string (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+def json_dumps_indent(obj) -> bytes:
+    """Serialize obj to 2-space indented UTF-8 JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+def json_loads(data):
+    """
+    Parse JSON from bytes or str (orjson when installed)
+
+    Raises:
+        ValueError: data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+async def first_successful(attempts: Dict[str, Awaitable]) -> Tuple[Optional[str], Any]:
+    """
+    Race awaitables and return (key, result) of the highest-priority success
+
+    All attempts run at once, but an earlier key (in dict order) always wins
+    over a later one: a later result is only taken once every earlier attempt
+    has failed. The rest are cancelled as soon as a winner is known.
+    Exceptions and falsy results count as failures; (None, None) if every
+    attempt fails.
+    """
+    tasks = {key: asyncio.ensure_future(attempt) for key, attempt in attempts.items()}
+
+    try:
+        # Later attempts keep running while an earlier one is awaited
+        for key, task in tasks.items():
+            await asyncio.wait((task,))
+            if not task.cancelled() and task.exception() is None and task.result():
+                return key, task.result()
+        return None, None
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+async def race_endpoints(cache: Dict[str, str], base_url: str, urls: List[str],
+                         attempt: Callable[[str], Awaitable]) -> Tuple[Optional[str], Any]:
+    """
+    Try candidate endpoint URLs with first_successful and remember the winner
+
+    Once an endpoint has worked for base_url, cache[base_url] is the only
+    URL tried (the discovery race is skipped).
+
+    Args:
+        cache: base_url -> winning URL, usually shared by a bot class
+        urls: Candidates, highest priority first
+        attempt: Tries one URL; a truthy result means it worked
+
+    Returns:
+        (url, result) of the winner, (None, None) if every URL failed
+    """
+    cached_url = cache.get(base_url)
+    if cached_url:
+        urls = [cached_url]
+
+    url, result = await first_successful({url: attempt(url) for url in urls})
+    if result:
+        cache[base_url] = url
+    return url, result